@@ -1,30 +1,47 @@
 import streamlit as st
-import numpy as np
-from qiskit import QuantumCircuit, QuantumRegister, ClassicalRegister, transpile
-from qiskit_aer import Aer
-from qiskit.circuit.library import QFT
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
 import os
-import hashlib
 from dotenv import load_dotenv
-from models import db, User
+from models import db, User, migrate_password_hashes
+from quantum import quantum_hash, verify_password, needs_rehash, init_worker, DUMMY_HASH
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
 from datetime import datetime
 
 # Load environment variables
 load_dotenv()
 
-# Initialize Flask app
-flask_app = Flask(__name__)
-flask_app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///quantum_auth.db'
-flask_app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+@st.cache_resource(show_spinner=False)
+def _create_flask_app():
+    """Create the Flask app, its engine and the tables once per server process"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///quantum_auth.db'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+    # Initialize database
+    db.init_app(app)
+
+    # Create database tables
+    with app.app_context():
+        event.listen(db.engine, "connect", _set_sqlite_pragma)
+        db.create_all()
+        migrate_password_hashes()
 
-# Initialize database
-db.init_app(flask_app)
+    return app
 
-# Create database tables
-with flask_app.app_context():
-    db.create_all()
+def _set_sqlite_pragma(dbapi_conn, _):
+    """Use WAL so registry reads and last_login writes don't block each other"""
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.close()
+
+# Initialize Flask app
+flask_app = _create_flask_app()
 
 # Configure Streamlit page
 st.set_page_config(
@@ -83,71 +100,28 @@ if 'username' not in st.session_state:
 if 'circuit_image' not in st.session_state:
     st.session_state.circuit_image = None
 
-def quantum_hash(password: str, seed=None) -> str:
-    """
-    Create a deterministic quantum hash using Qiskit quantum circuits
-    
-    Parameters:
-    password (str): Password to hash
-    seed (int): Optional seed for deterministic results
-    
-    Returns:
-    str: Hexadecimal hash value
+@st.cache_resource
+def _hash_pool():
+    """Worker processes for quantum hashing, shared by all sessions
+
+    Workers are spawned rather than forked from the multi-threaded Streamlit
+    server, where a fork can inherit locks held by other threads. Each worker
+    fills its own peak table in quantum.py.
     """
-    # Set random seed if provided
-    if seed is not None:
-        np.random.seed(seed)
-    
-    # Pre-process the password with SHA-256 to get a consistent length and bit pattern
-    # This ensures a more stable input for the quantum circuit
-    sha_hash = hashlib.sha256(password.encode('utf-8')).hexdigest()
-    binary = ''.join(format(int(c, 16), '04b') for c in sha_hash[:5])  # Use first 5 hex chars (20 bits)
-    
-    # Create quantum registers
-    n_qubits = len(binary)  # Using 20 qubits from SHA-256 pre-processing
-    qr = QuantumRegister(n_qubits, 'q')
-    cr = ClassicalRegister(n_qubits, 'c')
-    qc = QuantumCircuit(qr, cr)
-    
-    # Apply quantum operations
-    # Initialize qubits based on password bits
-    for i, bit in enumerate(binary):
-        if bit == '1':
-            qc.x(qr[i])
-    
-    # Apply Hadamard gates to create superposition
-    qc.h(qr)
-    
-    # Apply QFT
-    qc.append(QFT(n_qubits), range(n_qubits))
-    
-    # Add entanglement
-    for i in range(n_qubits-1):
-        qc.cx(qr[i], qr[i+1])
-    
-    # Inverse QFT
-    qc.append(QFT(n_qubits).inverse(), range(n_qubits))
-    
-    # Measure qubits
-    qc.measure(qr, cr)
-    
-    # Execute the circuit with shots=1024 to get the most probable outcome
-    backend = Aer.get_backend('qasm_simulator')
-    transpiled_circuit = transpile(qc, backend)
-    job = backend.run(transpiled_circuit, shots=1024, seed_simulator=42 if seed is None else seed)
-    result = job.result()
-    counts = result.get_counts(qc)
-    
-    # Get the most frequent measurement outcome
-    measured_state = max(counts.items(), key=lambda x: x[1])[0]
-    
-    # Convert binary to hexadecimal for shorter hash
-    hash_value = hex(int(measured_state, 2))[2:]
-    
-    # Return combined hash (add SHA-256 suffix for extra security)
-    final_hash = hash_value + sha_hash[-16:]
-    
-    return final_hash
+    return ProcessPoolExecutor(
+        max_workers=max(1, (os.cpu_count() or 2) // 2),
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=init_worker
+    )
+
+@st.cache_data(ttl=30)
+def _fetch_users():
+    """Return (username, last login) rows for the registry, cached across reruns"""
+    with flask_app.app_context():
+        return [
+            (user.username, user.last_login.strftime("%Y-%m-%d %H:%M:%S") if user.last_login else "Never")
+            for user in User.query.all()
+        ]
 
 def main():
     # Display title with custom styling
@@ -178,9 +152,8 @@ def main():
         - Quantum measurements
         
         For consistent results, we use:
-        - A fixed seed for simulation
-        - Pre-processing with SHA-256
-        - Multiple shots to find the most probable outcome
+        - Pre-processing with BLAKE2b
+        - The most probable outcome, read directly from the final statevector
         """)
     
     if not st.session_state.authenticated:
@@ -194,13 +167,27 @@ def main():
                 
                 if submit_login:
                     if username and password:
-                        # Use fixed seed=42 for consistent hashing
-                        hashed_password = quantum_hash(password, seed=42)
                         with flask_app.app_context():
-                            user = User.query.filter_by(username=username).first()
-                            if user and user.password_hash == hashed_password:
-                                user.last_login = datetime.utcnow()
+                            # Fetch only the columns needed, without loading a User object
+                            user = db.session.execute(
+                                db.select(User.id, User.password_hash)
+                                .where(User.username == username)
+                                .limit(1)
+                            ).first()
+                            # Hash in a worker process so concurrent logins don't serialize
+                            verified = _hash_pool().submit(
+                                verify_password, password, user.password_hash if user else DUMMY_HASH
+                            ).result()
+                            if user and verified:
+                                values = {'last_login': datetime.utcnow()}
+                                # Replace hashes from the sampled circuit
+                                if needs_rehash(user.password_hash):
+                                    values['password_hash'] = _hash_pool().submit(quantum_hash, password).result()
+                                db.session.execute(
+                                    db.update(User).where(User.id == user.id).values(**values)
+                                )
                                 db.session.commit()
+                                _fetch_users.clear()
                                 st.session_state.authenticated = True
                                 st.session_state.username = username
                                 st.success("Quantum authentication successful! 🌟")
@@ -225,17 +212,19 @@ def main():
                             st.error("Quantum signature requires at least 8 characters")
                         else:
                             with flask_app.app_context():
-                                if User.query.filter_by(username=new_username).first():
+                                if db.session.execute(
+                                    db.select(User.id).where(User.username == new_username).limit(1)
+                                ).first():
                                     st.error("Quantum state already exists")
                                 else:
-                                    # Use fixed seed=42 for consistent hashing
-                                    hashed_password = quantum_hash(new_password, seed=42)
+                                    hashed_password = _hash_pool().submit(quantum_hash, new_password).result()
                                     new_user = User(
                                         username=new_username,
                                         password_hash=hashed_password
                                     )
                                     db.session.add(new_user)
                                     db.session.commit()
+                                    _fetch_users.clear()
                                     st.success("Quantum state registered successfully! 🌟")
                     else:
                         st.error("Please fill in all fields")
@@ -254,12 +243,9 @@ def main():
             st.metric("Entanglement", "99.9%", delta="0.1%")
         
         # Display registered quantum states
-        with flask_app.app_context():
-            users = User.query.all()
-            st.markdown("### Quantum State Registry")
-            for user in users:
-                last_login = user.last_login.strftime("%Y-%m-%d %H:%M:%S") if user.last_login else "Never"
-                st.markdown(f"- 🌌 {user.username} (Last quantum interaction: {last_login})")
+        st.markdown("### Quantum State Registry")
+        for username, last_login in _fetch_users():
+            st.markdown(f"- 🌌 {username} (Last quantum interaction: {last_login})")
         
         if st.button("Collapse Quantum State (Logout)"):
             st.session_state.authenticated = False
@@ -6,9 +6,21 @@ db = SQLAlchemy()
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
-    password_hash = db.Column(db.String(256), nullable=False)
+    password_hash = db.Column(db.LargeBinary, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     last_login = db.Column(db.DateTime)
 
     def __repr__(self):
-        return f'<User {self.username}>'
\ No newline at end of file
+        return f'<User {self.username}>'
+
+def migrate_password_hashes():
+    """Convert legacy hex hashes stored as text to the binary column format"""
+    rows = db.session.execute(
+        db.select(User.id, db.type_coerce(User.password_hash, db.String))
+        .where(db.func.typeof(User.password_hash) == 'text')
+    ).all()
+    for user_id, stored_hash in rows:
+        db.session.execute(
+            db.update(User).where(User.id == user_id).values(password_hash=stored_hash.encode('ascii'))
+        )
+    db.session.commit()
@@ -0,0 +1,497 @@
+import functools
+import hashlib
+import hmac
+import os
+from typing import TYPE_CHECKING
+import numpy as np
+
+try:
+    import numba
+except ImportError:  # Optional: the NumPy reduction is used instead
+    numba = None
+
+# Qiskit is only needed for legacy hashes and QUANTUM_HASH_BACKEND=aer, so it
+# is imported on first use (see _aer_backend) to keep startup cheap
+if TYPE_CHECKING:
+    from qiskit import QuantumCircuit
+
+# Kept out of app.py: Streamlit re-executes the app script on every rerun,
+# while this module is imported once per process, so the objects built here
+# are shared by every login and registration.
+
+N_QUBITS = 16  # First 2 bytes (16 bits) of the BLAKE2b digest
+
+# Version byte of hashes computed from the final statevector, followed by the
+# peak outcome and the last 8 bytes of the BLAKE2b digest. Stored hashes
+# without it are the ASCII hex strings of legacy_quantum_hash.
+HASH_PREFIX = b'\x04'
+_PEAK_BYTES = (N_QUBITS + 7) // 8
+_SUFFIX_BYTES = 8
+
+# A well-formed hash of the current version for login to check when the
+# username is unknown, so a failed lookup costs the same hashing work as a
+# wrong password
+DUMMY_HASH = HASH_PREFIX + bytes(_PEAK_BYTES + _SUFFIX_BYTES)
+
+# Peak probabilities are often degenerate; outcomes within this relative
+# tolerance of the maximum count as tied and the lowest index wins. Over all
+# 2**16 inputs, exact ties differ by float noise (below 1e-14) and distinct
+# levels by at least 2.8e-6, so the tolerance is well clear of both.
+_PEAK_TOLERANCE = 1e-9
+
+# Qubits of the sampled circuit behind legacy hashes
+_LEGACY_QUBITS = 20
+
+
+def _parity_table(n_qubits: int) -> np.ndarray:
+    """
+    Compute the popcount parity of every basis index
+
+    Parameters:
+    n_qubits (int): Number of qubits
+
+    Returns:
+    np.ndarray: 0/1 parity for each of the 2**n_qubits indices
+    """
+    parity = np.zeros(1 << n_qubits, dtype=np.uint8)
+    for i in range(n_qubits):
+        parity[1 << i:2 << i] = parity[:1 << i] ^ 1
+    return parity
+
+
+@functools.cache
+def _kernel_tables(n_qubits: int) -> tuple:
+    """
+    Build the index tables _peak_states needs for one circuit size
+
+    Parameters:
+    n_qubits (int): Number of qubits
+
+    Returns:
+    tuple: (basis indices, popcount parity, CNOT ladder gather indices)
+    """
+    basis = np.arange(1 << n_qubits)
+
+    # The CNOT ladder sends |k> to the prefix XOR of its bits. Its inverse XORs
+    # each bit with the one below, so the permuted state is a single gather.
+    cx_source = (basis ^ (basis << 1)) & ((1 << n_qubits) - 1)
+
+    return basis, _parity_table(n_qubits), cx_source
+
+
+# Inputs per batched kernel call or Aer job, bounding the statevectors held at
+# once; a 16-qubit row holds 1 MiB
+_BATCH_ROWS = 8
+
+
+def _peak_states(xs: np.ndarray, n_qubits: int, tolerance: float) -> np.ndarray:
+    """
+    Find the most probable outcome of the hashing circuit for a batch of inputs
+
+    Computes the final statevectors of X layer, Hadamard wall, QFT, CNOT
+    ladder and inverse QFT with NumPy instead of simulating the circuit.
+
+    Parameters:
+    xs (np.ndarray): Basis states prepared by the X layer (qubit i is bit i)
+    n_qubits (int): Number of qubits
+    tolerance (float): Relative tolerance for tied peaks
+
+    Returns:
+    np.ndarray: Lowest basis index with the peak probability, per input
+    """
+    basis, parity, cx_source = _kernel_tables(n_qubits)
+
+    # Hadamard wall on |x> gives amplitude (-1)^popcount(x & y) on every |y>
+    states = 1.0 - 2.0 * parity[basis & xs[:, None]]
+
+    # Qiskit's QFT uses the e^(+2*pi*i*jk/N) convention, i.e. NumPy's inverse FFT
+    states = np.fft.ifft(states, axis=1)
+
+    # Add entanglement
+    states = states[:, cx_source]
+
+    # Inverse QFT
+    states = np.fft.fft(states, axis=1)
+
+    # Normalization is irrelevant for locating the peak
+    if numba is not None:
+        return _fused_peak_index(states, tolerance)
+    return _peak_index(states.real ** 2 + states.imag ** 2, tolerance)
+
+
+def _peak_index(probs: np.ndarray, tolerance: float):
+    """
+    Pick the lowest index whose probability ties with the maximum, per row
+    """
+    peaks = probs.max(axis=-1, keepdims=True)
+    return np.argmax(probs >= peaks * (1 - tolerance), axis=-1)
+
+
+if numba is not None:
+    @numba.njit(parallel=True, cache=True)
+    def _fused_peak_index(states, tolerance):
+        """
+        Same result as _peak_index, without materializing |psi|^2
+
+        Parallel max and min-index reductions over each row save the
+        probability array and the boolean mask per input.
+        """
+        rows, dim = states.shape
+        out = np.empty(rows, dtype=np.int64)
+        for r in range(rows):
+            peak = 0.0
+            for i in numba.prange(dim):
+                v = states[r, i]
+                peak = max(peak, v.real * v.real + v.imag * v.imag)
+
+            threshold = peak * (1 - tolerance)
+            first = dim
+            for i in numba.prange(dim):
+                v = states[r, i]
+                if v.real * v.real + v.imag * v.imag >= threshold:
+                    first = min(first, i)
+            out[r] = first
+        return out
+
+
+def _set_qubits(bits: int, n_qubits: int):
+    """
+    Yield the qubits to flip for a password prefix
+
+    Parameters:
+    bits (int): Prefix bits, the most significant one driving qubit 0
+    n_qubits (int): Number of prefix bits
+
+    Returns:
+    Iterator[int]: Indices of qubits initialized to |1>
+    """
+    while bits:
+        low = bits & -bits
+        yield n_qubits - low.bit_length()
+        bits ^= low
+
+
+def _prefix_bits(digest: bytes, n_qubits: int) -> int:
+    """
+    Take the top n_qubits (at most 24) bits of a digest
+    """
+    return int.from_bytes(digest[:3], 'big') >> (24 - n_qubits)
+
+
+# The peak depends only on the password prefix, so results are stored per
+# prefix. The table takes 256 KiB and about two and a half minutes of kernel
+# runs to fill, so entries are computed the first time a prefix is seen.
+_UNSET = np.iinfo(np.uint32).max
+
+
+@functools.cache
+def _peak_table() -> np.ndarray:
+    """
+    Allocate the empty peak table on first use
+    """
+    return np.full(1 << N_QUBITS, _UNSET, dtype=np.uint32)
+
+
+def _lookup_peaks(idxs: np.ndarray) -> np.ndarray:
+    """
+    Read peaks for password prefixes, computing the ones not seen before
+
+    Parameters:
+    idxs (np.ndarray): Password prefixes
+
+    Returns:
+    np.ndarray: Peak outcome for each prefix
+    """
+    n_qubits, tolerance = N_QUBITS, _PEAK_TOLERANCE
+    table = _peak_table()
+    missing = np.unique(idxs[table[idxs] == _UNSET])
+    if missing.size:
+        qubit_lists = [list(_set_qubits(int(i), n_qubits)) for i in missing]
+        # QUANTUM_HASH_BACKEND=aer runs the circuit on Aer; both give the same peak
+        use_aer = os.getenv('QUANTUM_HASH_BACKEND', 'numpy') == 'aer'
+        xs = np.array([sum(1 << q for q in qubits) for qubits in qubit_lists])
+        for start in range(0, len(xs), _BATCH_ROWS):
+            chunk = slice(start, start + _BATCH_ROWS)
+            if use_aer:
+                peaks = _aer_peak_states(qubit_lists[chunk], n_qubits, tolerance)
+            else:
+                peaks = _peak_states(xs[chunk], n_qubits, tolerance)
+            table[missing[chunk]] = peaks
+    return table[idxs]
+
+
+def quantum_hash_batch(passwords: list) -> list:
+    """
+    Create quantum hashes for several passwords at once
+
+    Prefixes missing from the table are computed together in batched FFTs.
+
+    Parameters:
+    passwords (list): Passwords to hash
+
+    Returns:
+    list: Binary hash value for each password
+    """
+    # Pre-process the passwords with BLAKE2b to get a consistent length and
+    # bit pattern. This ensures a more stable input for the quantum circuit
+    digests = [
+        hashlib.blake2b(password.encode('utf-8'), digest_size=32).digest()
+        for password in passwords
+    ]
+    idxs = np.array([_prefix_bits(digest, N_QUBITS) for digest in digests], dtype=np.int64)
+    peaks = _lookup_peaks(idxs)
+
+    # Return combined hashes (add BLAKE2b suffix for extra security)
+    return [
+        HASH_PREFIX + int(measured_int).to_bytes(_PEAK_BYTES, 'big') + digest[-_SUFFIX_BYTES:]
+        for measured_int, digest in zip(peaks, digests)
+    ]
+
+
+def quantum_hash(password: str) -> bytes:
+    """
+    Create a deterministic quantum hash from the hashing circuit's statevector
+
+    Once a 16-bit prefix has been seen, this is one BLAKE2b and a table lookup.
+
+    Parameters:
+    password (str): Password to hash
+
+    Returns:
+    bytes: Binary hash value
+    """
+    return quantum_hash_batch([password])[0]
+
+
+def verify_password(password: str, stored_hash: bytes) -> bool:
+    """
+    Check a password against a stored quantum_hash or legacy hash
+
+    Parameters:
+    password (str): Password to check
+    stored_hash (bytes): Hash from the database
+
+    Returns:
+    bool: True if the password matches
+    """
+    if stored_hash.startswith(HASH_PREFIX):
+        computed = quantum_hash(password)
+    else:
+        # Legacy hashes were always created with seed=42
+        computed = legacy_quantum_hash(password, seed=42).encode('ascii')
+    # Constant-time comparison so response timing does not leak the hash
+    return hmac.compare_digest(computed, stored_hash)
+
+
+def needs_rehash(stored_hash: bytes) -> bool:
+    """
+    Check whether a stored hash should be replaced by quantum_hash
+    """
+    return not stored_hash.startswith(HASH_PREFIX)
+
+
+# Aer threads per job; 0 lets Aer use every core
+_AER_THREADS = 0
+
+
+def init_worker():
+    """
+    Limit Aer and Numba to one thread in a hashing worker process
+
+    With several workers hashing at once, per-job threading would
+    oversubscribe the CPU.
+    """
+    global _AER_THREADS
+    _AER_THREADS = 1
+    if numba is not None:
+        numba.set_num_threads(1)
+
+
+@functools.cache
+def _qft_circuits(n_qubits: int) -> tuple:
+    """
+    Build the QFT and its inverse once, decomposed into H, CP and SWAP gates
+
+    Aer runs these gates natively, so transpiling the templates needs no
+    high-level synthesis or basis translation for them.
+
+    Parameters:
+    n_qubits (int): Number of qubits
+
+    Returns:
+    tuple: (QFT, inverse QFT) circuits
+    """
+    from qiskit.circuit.library import QFT
+
+    qft = QFT(n_qubits).decompose()
+    return qft, qft.inverse()
+
+
+def _build_template(n_qubits: int, measure: bool = True) -> 'QuantumCircuit':
+    """
+    Build the password-independent part of the hashing circuit
+
+    Parameters:
+    n_qubits (int): Number of qubits in the circuit
+    measure (bool): Measure all qubits, otherwise save the final statevector
+
+    Returns:
+    QuantumCircuit: Hadamard wall, QFT, CNOT ladder, inverse QFT and measurement
+    """
+    from qiskit import QuantumCircuit, QuantumRegister, ClassicalRegister
+    import qiskit_aer  # noqa: F401  Registers save_statevector on QuantumCircuit
+
+    qr = QuantumRegister(n_qubits, 'q')
+    if not measure:
+        qc = QuantumCircuit(qr)
+    else:
+        cr = ClassicalRegister(n_qubits, 'c')
+        qc = QuantumCircuit(qr, cr)
+
+    # Apply Hadamard gates to create superposition
+    qc.h(qr)
+
+    qft, iqft = _qft_circuits(n_qubits)
+
+    # Apply QFT
+    qc.compose(qft, qr, inplace=True)
+
+    # Add entanglement: one broadcast call adds CX(i, i+1) for i = 0..n-2 in order
+    qc.cx(qr[:-1], qr[1:])
+
+    # Inverse QFT
+    qc.compose(iqft, qr, inplace=True)
+
+    # Measure qubits
+    if measure:
+        qc.measure(qr, cr)
+    else:
+        qc.save_statevector()
+
+    return qc
+
+
+@functools.cache
+def _aer_backend():
+    """
+    Import Qiskit Aer and create the simulator backend on first use
+    """
+    from qiskit_aer import AerSimulator
+
+    # For the legacy circuit it samples exactly like the qasm_simulator
+    # backend the legacy hashes were made with
+    return AerSimulator(method='statevector')
+
+
+@functools.cache
+def _aer_template(n_qubits: int, measure: bool) -> 'QuantumCircuit':
+    """
+    Build and transpile a circuit template on first use
+
+    Only the initial X layer depends on the password, so the rest of the
+    circuit is built and transpiled once per size and kind.
+
+    Parameters:
+    n_qubits (int): Number of qubits in the circuit
+    measure (bool): Measure all qubits, otherwise save the final statevector
+
+    Returns:
+    QuantumCircuit: Transpiled template
+    """
+    from qiskit import transpile
+
+    return transpile(_build_template(n_qubits, measure), _aer_backend())
+
+
+def _aer_peak_states(qubit_lists: list, n_qubits: int, tolerance: float) -> list:
+    """
+    Find the most probable outcome of the hashing circuit on Aer for a batch of inputs
+
+    Reads the peaks from the saved statevectors, so a single shot is enough.
+    All circuits go into one job so Aer can run them as parallel experiments;
+    a single 16-qubit circuit gains little from Aer's intra-circuit threading.
+    The job result holds every statevector, so callers pass at most
+    _BATCH_ROWS inputs. In a hashing worker init_worker limits Aer to one
+    thread, so there the experiments run one after another.
+
+    Parameters:
+    qubit_lists (list): Qubits flipped by the X layer, per input
+    n_qubits (int): Number of qubits
+    tolerance (float): Relative tolerance for tied peaks
+
+    Returns:
+    list: Lowest basis index with the peak probability, per input
+    """
+    from qiskit import QuantumCircuit
+
+    backend = _aer_backend()
+    template = _aer_template(n_qubits, measure=False)
+    circuits = []
+    for qubits in qubit_lists:
+        qc = QuantumCircuit(*template.qregs)
+        # qc.x raises on an empty qubit list, which an all-zero prefix gives
+        if qubits:
+            qc.x(qubits)
+        qc.compose(template, inplace=True)
+        circuits.append(qc)
+
+    # max_parallel_experiments=0 lets Aer run as many as the thread limit allows
+    result = backend.run(
+        circuits, shots=1, max_parallel_experiments=0, max_parallel_threads=_AER_THREADS
+    ).result()
+    peaks = []
+    for i in range(len(circuits)):
+        sv = np.asarray(result.data(i)['statevector'])
+        peaks.append(int(_peak_index(np.abs(sv) ** 2, tolerance)))
+    return peaks
+
+
+def legacy_quantum_hash(password: str, seed=None) -> str:
+    """
+    Create a quantum hash by sampling the hashing circuit on Aer
+
+    This is the original scheme, kept to verify hashes stored before
+    HASH_PREFIX was introduced. The most frequent of 1024 shots depends on
+    the simulator seed, not only on the statevector.
+
+    Parameters:
+    password (str): Password to hash
+    seed (int): Simulator seed, 42 if not given
+
+    Returns:
+    str: Hexadecimal hash value
+    """
+    from qiskit import QuantumCircuit
+
+    digest = hashlib.sha256(password.encode('utf-8')).digest()
+
+    # Initialize qubits based on password bits
+    backend = _aer_backend()
+    template = _aer_template(_LEGACY_QUBITS, measure=True)
+    qc = QuantumCircuit(*template.qregs, *template.cregs)
+    qubits = list(_set_qubits(_prefix_bits(digest, _LEGACY_QUBITS), _LEGACY_QUBITS))
+    if qubits:
+        qc.x(qubits)
+
+    # Prepend the X layer to the pre-transpiled template
+    qc.compose(template, inplace=True)
+
+    # Execute the circuit with shots=1024 to get the most probable outcome
+    job = backend.run(
+        qc, shots=1024, seed_simulator=42 if seed is None else seed,
+        max_parallel_threads=_AER_THREADS
+    )
+    result = job.result()
+    counts = result.get_counts(qc)
+
+    # Get the most frequent measurement outcome. Counts.most_frequent() raises
+    # on ties, which are common here; max keeps the first of the tied outcomes.
+    measured_state = max(counts, key=counts.get)
+
+    # Convert binary to hexadecimal for shorter hash
+    hash_value = hex(int(measured_state, 2))[2:]
+
+    # Return combined hash (add SHA-256 suffix for extra security)
+    final_hash = hash_value + digest[-8:].hex()
+
+    return final_hash
@@ -0,0 +1,113 @@
+import functools
+import hashlib
+
+import numpy as np
+import pytest
+
+import quantum
+from quantum import (
+    HASH_PREFIX, legacy_quantum_hash, needs_rehash, quantum_hash, verify_password
+)
+
+# legacy_quantum_hash('password', seed=42) as computed by the original code
+LEGACY_PASSWORD_HASH = 'bee832a11ef721d1542d8'
+
+
+def test_legacy_hash_matches_baseline():
+    pytest.importorskip('qiskit_aer')
+    assert legacy_quantum_hash('password', seed=42) == LEGACY_PASSWORD_HASH
+
+
+@pytest.mark.parametrize('use_numba', [False, True])
+def test_numpy_peaks_match_aer(monkeypatch, use_numba):
+    pytest.importorskip('qiskit_aer')
+    if use_numba:
+        pytest.importorskip('numba')
+    else:
+        monkeypatch.setattr(quantum, 'numba', None)
+
+    n_qubits, tolerance = quantum.N_QUBITS, quantum._PEAK_TOLERANCE
+    prefixes = [0, 1, 0x8001, 0xbee8, 0xffff]
+    qubit_lists = [list(quantum._set_qubits(p, n_qubits)) for p in prefixes]
+    xs = np.array([sum(1 << q for q in qubits) for qubits in qubit_lists])
+
+    expected = quantum._aer_peak_states(qubit_lists, n_qubits, tolerance)
+    assert quantum._peak_states(xs, n_qubits, tolerance).tolist() == expected
+
+
+def test_legacy_hash_zero_prefix():
+    pytest.importorskip('qiskit_aer')
+    # The 20-bit SHA-256 prefix of this password is 0, so no qubit is flipped
+    password = 'pw02307184'
+    digest = hashlib.sha256(password.encode('utf-8')).digest()
+    assert quantum._prefix_bits(digest, quantum._LEGACY_QUBITS) == 0
+
+    stored = legacy_quantum_hash(password, seed=42)
+    assert stored.endswith(digest[-8:].hex())
+    assert verify_password(password, stored.encode('ascii'))
+
+
+def test_aer_hash_zero_prefix(monkeypatch):
+    pytest.importorskip('qiskit_aer')
+    # The 16-bit BLAKE2b prefix of this password is 0
+    password = 'pw00071079'
+    digest = hashlib.blake2b(password.encode('utf-8'), digest_size=32).digest()
+    assert quantum._prefix_bits(digest, quantum.N_QUBITS) == 0
+
+    hashes = []
+    for backend in ['numpy', 'aer']:
+        # A fresh peak table so the prefix is computed by this backend
+        monkeypatch.setenv('QUANTUM_HASH_BACKEND', backend)
+        monkeypatch.setattr(quantum, '_peak_table', functools.cache(quantum._peak_table.__wrapped__))
+        hashes.append(quantum_hash(password))
+    assert hashes[0] == hashes[1]
+
+
+def test_verify_password_current():
+    stored = quantum_hash('password')
+    assert stored.startswith(HASH_PREFIX)
+    assert verify_password('password', stored)
+    assert not verify_password('passw0rd', stored)
+    assert not needs_rehash(stored)
+
+
+def test_verify_password_legacy():
+    pytest.importorskip('qiskit_aer')
+    stored = LEGACY_PASSWORD_HASH.encode('ascii')
+    assert verify_password('password', stored)
+    assert not verify_password('passw0rd', stored)
+    assert needs_rehash(stored)
+
+
+def test_migrate_password_hashes(tmp_path):
+    pytest.importorskip('flask_sqlalchemy')
+    from flask import Flask
+    from models import db, User, migrate_password_hashes
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{tmp_path / "test.db"}'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        # Rows written while password_hash was a String column hold TEXT values
+        db.session.execute(
+            db.text('INSERT INTO "user" (username, password_hash) VALUES (:username, :hash)'),
+            [
+                {'username': 'legacy', 'hash': LEGACY_PASSWORD_HASH},
+                {'username': 'other', 'hash': '3f0123456789abcdef01'},
+            ]
+        )
+        db.session.commit()
+
+        migrate_password_hashes()
+
+        rows = dict(db.session.execute(db.select(User.username, User.password_hash)).all())
+        types = db.session.execute(
+            db.select(db.func.typeof(User.password_hash)).distinct()
+        ).scalars().all()
+
+    assert rows == {
+        'legacy': LEGACY_PASSWORD_HASH.encode('ascii'),
+        'other': b'3f0123456789abcdef01',
+    }
+    assert types == ['blob']